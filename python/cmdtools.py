@@ -4,7 +4,6 @@ import subprocess
 import threading
 import sys
 from enum import Enum
-from datetime import datetime
 from io import StringIO
 
 class Task(object):
@@ -19,6 +18,7 @@ class Task(object):
 		self._nextTask = None
 
 	def execute(self, runner):
+		from datetime import datetime
 		self.startEvent()
 		self.start_on = datetime.now()
 		self.running = True
@@ -116,6 +116,9 @@ class TaskRunner(object):
 		return self.tasks.returncode
 
 	def execute(self, cmdlist):
+		# Our own output is buffered; flush it so it isn't reordered with the output of the child process:
+		sys.stdout.flush()
+		sys.stderr.flush()
 		p1 = subprocess.Popen(cmdlist, shell=False, stdout=self.stdout, stderr=self.stderr)
 		if self.outfile:
 			for line in p1.stdout:
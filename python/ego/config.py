@@ -3,10 +3,11 @@
 import sys
 
 import os
-import glob
 import json
+import pickle
+import stat
 from collections import OrderedDict
-from pathlib import Path
+from collections.abc import Mapping
 import configparser
 from configparser import InterpolationError
 
@@ -14,8 +15,101 @@ def join_path(x, y):
 	# ignore absolute paths (leading "/") in second component, for convenience...
 	return os.path.join(x, y.lstrip("/"))
 
+# Parsed modules-info JSON is cached here, keyed by the newest mtime of the info files:
+MODS_INFO_CACHE_DIR = "/var/cache/ego"
+
+def trusted_dir(path):
+	# A directory is trusted if it is owned by root or by us, and nobody else can write to it.
+	try:
+		st = os.stat(path)
+	except OSError:
+		return False
+	return st.st_uid in (0, os.geteuid()) and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+class LazyModInfo(Mapping):
+
+	"""
+	Maps each installed ego module's name to its info dict, reading info only when it is first looked up.
+
+	If an aggregate modules-info.json (mapping module name to its info) is installed, it is the only source of
+	module info. Otherwise, a module's info comes from modules-info/<name>.json. Iterating over items() or values()
+	needs every module's info, so without an aggregate those load all the files in one go via ``load_all`` (which
+	may use a cache) instead of one file at a time.
+	"""
+
+	def __init__(self, mods, info_dir, aggregate_path, load_all):
+		self._mods = mods
+		self._info_template = info_dir + "/%s.json"
+		self._aggregate_path = aggregate_path
+		self._aggregate = None
+		self._aggregate_checked = False
+		self._load_all = load_all
+		self._all_loaded = False
+		self._cache = {}
+
+	def _get_aggregate(self):
+		if not self._aggregate_checked:
+			self._aggregate_checked = True
+			try:
+				with open(self._aggregate_path, "rb") as inf:
+					self._aggregate = json.load(inf)
+			except FileNotFoundError:
+				pass
+		return self._aggregate
+
+	def __getitem__(self, mod):
+		try:
+			return self._cache[mod]
+		except KeyError:
+			pass
+		if mod not in self._mods:
+			raise KeyError(mod)
+		aggregate = self._get_aggregate()
+		if aggregate is not None:
+			info = aggregate.get(mod, {})
+		else:
+			try:
+				with open(self._info_template % mod, "rb") as inf:
+					info = json.load(inf)
+			except FileNotFoundError:
+				info = {}
+		self._cache[mod] = info
+		return info
+
+	def __contains__(self, mod):
+		return mod in self._mods
+
+	def __iter__(self):
+		return iter(self._mods)
+
+	def __len__(self):
+		return len(self._mods)
+
+	def _ensure_all_loaded(self):
+		if not self._all_loaded:
+			aggregate = self._get_aggregate()
+			if aggregate is not None:
+				self._cache = {mod: aggregate.get(mod, {}) for mod in self._mods}
+			else:
+				self._cache = self._load_all()
+			self._all_loaded = True
+
+	def items(self):
+		self._ensure_all_loaded()
+		return self._cache.items()
+
+	def values(self):
+		self._ensure_all_loaded()
+		return self._cache.values()
+
 class EgoConfig(object):
 
+	__slots__ = (
+		'root_path', 'ego_dir', 'ego_mods_dir', 'ego_mods_info_dir', 'ego_mods', 'ego_mods_info', 'settings',
+		'settings_path', 'meta_repo_root', 'sync_base_url', 'meta_repo_branch', 'repos_conf_path', 'kits_root',
+		'unprefixed_kits_root', 'sync_user', 'kits_depth', '_available', '_kit_metadata'
+	)
+
 	def get_setting(self, section, key, default=None):
 		if section in self.settings and key in self.settings[section]:
 			try:
@@ -53,14 +147,20 @@ class EgoConfig(object):
 			return False
 
 	def load_kit_metadata(self, fn):
-		if not hasattr(self, '_kit_%s' % fn):
-			path = Path(self.meta_repo_root) / 'metadata' / ('%s.json' % fn)
-			try:
-				with path.open() as f:
-					return json.loads(f.read(), object_pairs_hook=OrderedDict)
-			except OSError:
-				return {}
-		return getattr(self, '_kit_%s' % fn)
+		# Parsed metadata is memoized per file, and re-read if the file changes (ie. ego sync updated meta-repo):
+		path = os.path.join(self.meta_repo_root, 'metadata', '%s.json' % fn)
+		try:
+			st = os.stat(path)
+			stamp = (st.st_mtime_ns, st.st_size)
+			cached = self._kit_metadata.get(fn)
+			if cached is not None and cached[0] == stamp:
+				return cached[1]
+			with open(path) as f:
+				metadata = json.loads(f.read(), object_pairs_hook=OrderedDict)
+		except OSError:
+			return {}
+		self._kit_metadata[fn] = (stamp, metadata)
+		return metadata
 
 	@property
 	def kit_info_metadata(self):
@@ -160,18 +260,20 @@ class EgoConfig(object):
 		self.ego_mods_dir = "%s/modules" % self.ego_dir
 		self.ego_mods_info_dir = "%s/modules-info" % self.ego_dir
 		self.ego_mods = []
-		self.ego_mods_info = {}
+		self._kit_metadata = {}
 
 		if os.path.isdir(self.ego_mods_dir):
-			for match in glob.glob(self.ego_mods_dir + "/*.ego"):
-				self.ego_mods.append(match.split("/")[-1][:-4])
-		for mod in self.ego_mods:
-			inf_path = self.ego_mods_info_dir + "/" + mod + ".json"
-			if os.path.exists(inf_path):
-				with open(inf_path, "r") as inf:
-					self.ego_mods_info[mod] = json.loads(inf.read())
-			else:
-				self.ego_mods_info[mod] = {}
+			with os.scandir(self.ego_mods_dir) as it:
+				# Like glob("*.ego"), skip hidden files:
+				self.ego_mods = [
+					entry.name[:-4] for entry in it
+					if entry.name.endswith(".ego") and not entry.name.startswith(".") and entry.is_file()
+				]
+		# Module info is only read when needed -- running a single module only needs that module's info:
+		self.ego_mods_info = LazyModInfo(
+			self.ego_mods, self.ego_mods_info_dir, self.ego_dir + "/modules-info.json", self._load_mods_info
+		)
+		self._available = None
 		self.settings = settings
 		self.settings_path = settings_path
 
@@ -193,6 +295,92 @@ class EgoConfig(object):
 
 		self.kits_depth = self.get_setting("global", "kits_depth", 2)
 
+	def _load_mods_info(self):
+		# Loads the info of all modules from modules-info/ at once; see LazyModInfo. The directory is listed once
+		# rather than stat()ing a path per module:
+		entries = {}
+		if os.path.isdir(self.ego_mods_info_dir):
+			with os.scandir(self.ego_mods_info_dir) as it:
+				for entry in it:
+					entries[entry.name] = entry
+		present = {}
+		for mod in self.ego_mods:
+			entry = entries.get("%s.json" % mod)
+			if entry is not None:
+				present[mod] = entry
+
+		# Never trust a pickle derived from files that untrusted users could have modified:
+		cache_path = None
+		if present and trusted_dir(self.ego_mods_info_dir):
+			# The key covers the directory itself (files added or removed) and each file's name, size, mtime and
+			# ctime. ctime can't be preserved by installs that keep mtimes, so in-place rewrites are caught as well.
+			file_stats = []
+			for mod in sorted(present):
+				st = present[mod].stat()
+				file_stats.append((present[mod].name, st.st_size, st.st_mtime_ns, st.st_ctime_ns))
+			cache_key = (
+				self.ego_mods_info_dir, os.stat(self.ego_mods_info_dir).st_mtime_ns, sorted(self.ego_mods), file_stats
+			)
+			mtime = max(x[2] for x in file_stats)
+			cache_path = "%s/mods_info.%d.pkl" % (MODS_INFO_CACHE_DIR, mtime)
+			mods_info = self._read_mods_info_cache(cache_path, cache_key)
+			if mods_info is not None:
+				return mods_info
+
+		mods_info = {}
+		for mod in self.ego_mods:
+			entry = present.get(mod)
+			if entry is None:
+				mods_info[mod] = {}
+				continue
+			with open(entry.path, "rb") as inf:
+				mods_info[mod] = json.load(inf)
+		if cache_path is not None:
+			self._write_mods_info_cache(cache_path, cache_key, mods_info)
+		return mods_info
+
+	@staticmethod
+	def _read_mods_info_cache(cache_path, cache_key):
+		if not trusted_dir(MODS_INFO_CACHE_DIR):
+			return None
+		try:
+			with open(cache_path, "rb") as f:
+				key, mods_info = pickle.load(f)
+		except Exception:
+			# Missing, truncated or otherwise unusable -- unpickling can raise almost anything. Just rebuild.
+			return None
+		if key != cache_key:
+			return None
+		return mods_info
+
+	@staticmethod
+	def _write_mods_info_cache(cache_path, cache_key, mods_info):
+		# The cache is only an optimization -- silently give up if we can't write it (ie. not running as root.)
+		import tempfile
+		try:
+			os.makedirs(MODS_INFO_CACHE_DIR, mode=0o755, exist_ok=True)
+			if not trusted_dir(MODS_INFO_CACHE_DIR):
+				return
+			fd, tmp_path = tempfile.mkstemp(dir=MODS_INFO_CACHE_DIR, prefix=".mods_info.")
+			try:
+				with os.fdopen(fd, "wb") as f:
+					pickle.dump((cache_key, mods_info), f)
+				os.chmod(tmp_path, 0o644)
+				os.replace(tmp_path, cache_path)
+			except BaseException:
+				os.unlink(tmp_path)
+				raise
+			# Remove caches for older versions of the info files:
+			cache_fn = os.path.basename(cache_path)
+			with os.scandir(MODS_INFO_CACHE_DIR) as it:
+				for entry in it:
+					if entry.name.startswith("mods_info.") and entry.name.endswith(".pkl") and entry.name != cache_fn:
+						os.unlink(entry.path)
+		except OSError:
+			pass
+
 	def available_modules(self):
-		for x in self.ego_mods:
-			yield x, self.ego_mods_info[x]
+		"""Returns a tuple of (module name, module info) pairs for all installed ego modules."""
+		if self._available is None:
+			self._available = tuple(self.ego_mods_info.items())
+		return self._available
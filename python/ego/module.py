@@ -1,22 +1,16 @@
-import argparse
-import importlib.machinery
 import sys
 import os
 
-from ego.output import Color, Output
 from ego.config import EgoConfig
 
-try:
-	has_mw_parser = True
-	from mediawiki.cli_parser import wikitext_parse
-except ImportError:
-	has_mw_parser = False
-	pass
+# argparse, importlib.machinery, ego.output and the mediawiki parser are imported where they are used, so that
+# importing this module stays cheap for short-lived invocations.
 
 __all__ = ['EgoModule', 'usage']
 
 
 def usage(config):
+	from ego.output import Color, Output
 	print("Usage: %s [module] [info|options]..." % os.path.basename(sys.argv[0]))
 	Output.header("Available ego modules")
 	for mod, info in config.available_modules():
@@ -51,38 +45,101 @@ class EgoModule:
 		self.info = config.ego_mods_info[name]
 		self.version = VERSION
 		self.options = None
+		self.parser = None
 		self.msgs = []
+		# Resolved once per invocation, for modules that write to stdout directly:
+		self._out = sys.stdout
 		self.setup()
 
 	def _no_repo_available(self, exit=True):
 		wikitext = "{{Note|Meta-repo has not yet been cloned, so no kit information is available. Type {{c|ego sync}}"
 		wikitext += " to perform an initial clone of meta-repo.}}"
-		if has_mw_parser:
-			wikitext_parse(wikitext, sys.stdout, indent="  ")
+		try:
+			from mediawiki.cli_parser import wikitext_parse
+		except ImportError:
+			self._out.write(wikitext)
 		else:
-			sys.stdout.write(wikitext)
-		sys.stdout.write("\n")
+			wikitext_parse(wikitext, self._out, indent="  ")
+		self._out.write("\n")
 		if exit:
 			sys.exit(1)
 
-	def __call__(self, *args):
+	def _version_string(self):
+		return "ego %(ego_version)s / %(module)s %(module_version)s (by %(module_author)s)" % {
+			'ego_version': self.version, 'module': self.name,
+			'module_version': self.info['version'], 'module_author': self.info['author'],
+		}
+
+	def _build_parser(self):
+		import argparse
 		parser = argparse.ArgumentParser('ego ' + self.name, description=self.info['description'])
 		if self.version:
-			parser.add_argument('--version', action='version', version=(
-				"ego %(ego_version)s / %(module)s %(module_version)s (by %(module_author)s)" % {
-					'ego_version': self.version, 'module': self.name,
-					'module_version': self.info['version'], 'module_author': self.info['author'],
-				}
-			))
+			parser.add_argument('--version', action='version', version=self._version_string())
 		verbosity_group = parser.add_mutually_exclusive_group()
 		verbosity_group.add_argument('--verbosity', default=1, type=int, help="Set verbosity level")
 		verbosity_group.add_argument('-v', default=0, action='count', help="Increase verbosity level by 1 per occurrence")
 		verbosity_group.add_argument('-q', default=0, action='count', help="Decrease verbosity level by 1 per occurrence")
 		self.add_arguments(parser)
+		return parser
+
+	def _parse_common(self, args):
+		"""
+		Parse ``args`` in a single pass, handling only the options every ego module has (--version, --verbosity,
+		-v and -q). Returns the resulting verbosity level, or None if anything else (including -h, errors and
+		abbreviated options) is encountered, in which case argparse should be used instead.
+		"""
+		verbosity = None
+		v = q = 0
+		pos = 0
+		while pos < len(args):
+			arg = args[pos]
+			pos += 1
+			if arg == '--version' and self.version:
+				print(self._version_string())
+				sys.exit(0)
+			elif arg.startswith('--verbosity'):
+				if arg == '--verbosity' and pos < len(args):
+					value = args[pos]
+					pos += 1
+				elif arg.startswith('--verbosity='):
+					value = arg[len('--verbosity='):]
+				else:
+					return None
+				try:
+					verbosity = int(value)
+				except ValueError:
+					return None
+			elif len(arg) > 1 and arg[0] == '-' and arg[1:] == 'v' * (len(arg) - 1):
+				v += len(arg) - 1
+			elif len(arg) > 1 and arg[0] == '-' and arg[1:] == 'q' * (len(arg) - 1):
+				q += len(arg) - 1
+			else:
+				return None
+		if (verbosity is not None) + bool(v) + bool(q) > 1:
+			# mutually exclusive -- let argparse report the error.
+			return None
+		return (1 if verbosity is None else verbosity) + v - q
+
+	def __call__(self, *args):
+		from ego.output import Output
+		if type(self).add_arguments is EgoModule.add_arguments:
+			# No module-specific arguments, so the common options can usually be handled without building an
+			# argparse parser at all:
+			verbosity = self._parse_common(args)
+			if verbosity is not None:
+				# Same shape as the argparse result, without importing argparse:
+				from types import SimpleNamespace
+				self.options = SimpleNamespace(parser=None)
+				Output.verbosity = verbosity
+				self.handle()
+				return
+		# Parsers bind handlers of this instance (set_defaults(handler=self.xxx)), so they can't be shared between
+		# instances; build one for this invocation.
+		parser = self.parser = self._build_parser()
 		options = parser.parse_args(args)
 		self.options = options
 		options = vars(options)
-		options["parser"] = self.parser = parser
+		options["parser"] = parser
 		Output.verbosity = options.pop('verbosity') + options.pop('v') - options.pop('q')
 
 		self.handle()
@@ -95,9 +152,13 @@ class EgoModule:
 
 	@classmethod
 	def run_ego_module(cls, modname, config, args, VERSION=None):
-		loader = importlib.machinery.SourceFileLoader(modname, '%s/modules/%s.ego' % (config.ego_dir, modname))
+		from ego.output import Color
+		if modname not in config.ego_mods:
+			# Don't bother creating a loader (and touching the filesystem) for a module we know isn't installed.
+			print(Color.RED + "Error: ego module \"%s\" not found." % modname + Color.END)
+			sys.exit(1)
 		try:
-			mod = loader.load_module()
+			mod = cls.get_ego_module(modname, config)
 			if mod:
 				ego_module = mod.Module(modname, config, VERSION)
 				ego_module(*args)
@@ -107,4 +168,25 @@ class EgoModule:
 		except FileNotFoundError:
 			return None
 
+	@staticmethod
+	def get_ego_module(modname, config):
+		"""Load and return the python module for ego module ``modname``, or None if it can't be loaded."""
+		import importlib.machinery
+		import importlib.util
+		path = '%s/modules/%s.ego' % (config.ego_dir, modname)
+		# The loader is passed explicitly since ".ego" isn't a registered source suffix. SourceFileLoader still
+		# reads and writes bytecode under modules/__pycache__, so unchanged modules aren't recompiled.
+		loader = importlib.machinery.SourceFileLoader(modname, path)
+		spec = importlib.util.spec_from_file_location(modname, path, loader=loader)
+		if spec is None:
+			return None
+		mod = importlib.util.module_from_spec(spec)
+		sys.modules[modname] = mod
+		try:
+			spec.loader.exec_module(mod)
+		except BaseException:
+			del sys.modules[modname]
+			raise
+		return mod
+
 # vim: ts=4 sw=4 noexpandtab
\ No newline at end of file
@@ -5,6 +5,7 @@
 # Copyright 2017-2018 Funtoo Solutions, Inc., Daniel Robbins and contributors.
 # See LICENSE.txt for terms of distribution.
 
+import os
 import sys
 import textwrap
 import shutil
@@ -16,6 +17,16 @@ else:
 term_size = shutil.get_terminal_size((80, 20))
 
 
+def _flush_std_streams():
+	# Output doesn't flush after every message. Anything still buffered when we fork would be inherited by the
+	# child and written out by both processes, so flush first:
+	sys.stdout.flush()
+	sys.stderr.flush()
+
+
+os.register_at_fork(before=_flush_std_streams)
+
+
 def ago(diff):
 
 	"""
@@ -179,53 +190,69 @@ class Output:
 
 	verbosity = 1
 
+	# Pre-built templates, so warnings and errors don't go through Color objects on every call:
+	_warning_template = Color.YELLOW + "WARNING: %s" + Color.END + "\n"
+	_error_template = Color.RED + "ERROR: %s" + Color.END + "\n"
+
 	@classmethod
 	def header(cls, info):
 		print("\n=== " + Color.BOLD + Color.GREEN + info + Color.END + ": ===\n")
 
+	@classmethod
+	def _write(cls, message, err=False):
+		if err:
+			# Diagnostics are written right away, after anything still buffered on stdout so ordering is preserved:
+			sys.stdout.flush()
+			sys.stderr.write(message)
+			sys.stderr.flush()
+		else:
+			sys.stdout.write(message)
+
 	@classmethod
 	def _output(cls, message, err=False):
 		message = str(message)
 		if not message.endswith('\n'):
 			message += '\n'
-		out = sys.stderr if err else sys.stdout
-		out.write(message)
-		out.flush()
+		cls._write(message, err=err)
+
+	@classmethod
+	def _output_ln(cls, message, err=False):
+		"""Output message followed by a newline. Unlike _output(), the message is not checked for one."""
+		cls._write("%s\n" % (message,), err=err)
 
 	@classmethod
 	def debug(cls, message):
-		"""Output debug message to stdout. Auto-append newline if missing"""
+		"""Output debug message to stdout, followed by a newline."""
 		if cls.verbosity > 1:
-			cls._output(message)
+			cls._output_ln(message)
 
 	@classmethod
 	def log(cls, message):
-		"""Output message to stdout. Auto-append newline if missing."""
+		"""Output message to stdout, followed by a newline."""
 		if cls.verbosity > 0:
-			cls._output(message)
+			cls._output_ln(message)
 
 	@classmethod
 	def echo(cls, message):
 		"""Output message as-is to stdout."""
 		if cls.verbosity > 0:
 			sys.stdout.write(str(message))
-			sys.stdout.flush()
 
 	@classmethod
 	def warning(cls, message):
-		"""Output warning message to stdout. Auto-append newline if missing."""
+		"""Output warning message to stdout, followed by a newline."""
 		if cls.verbosity > -1:
-			cls._output(Color.yellow("WARNING: " + str(message)))
+			cls._write(cls._warning_template % (message,))
 
 	@classmethod
 	def error(cls, message):
-		"""Output error message to stderr. Auto-append newline if missing."""
+		"""Output error message to stderr, followed by a newline."""
 		if cls.verbosity > -1:
-			cls._output(Color.red("ERROR: " + str(message)), err=True)
+			cls._write(cls._error_template % (message,), err=True)
 
 	@classmethod
 	def fatal(cls, message, exit_code=1):
-		"""Output error message to stderr and exit. Auto-append newline if missing."""
+		"""Output error message to stderr, followed by a newline, and exit."""
 		cls.error(message)
 		sys.exit(exit_code)
 
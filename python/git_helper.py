@@ -2,35 +2,50 @@
 
 import os
 from cmdtools import run_statusoutput, run
-from pathlib import Path
-from datetime import datetime
 from ego.output import Output
 
 class GitHelper(object):
 
+	__slots__ = (
+		'module', 'root', 'quiet', '_git_dir', '_head', '_fetch_head', '_commit_id_cache', '_last_sync_cache'
+	)
+
 	def __init__(self, module, root, quiet=False):
 		self.module = module
 		self.root = root
 		self.quiet = quiet
+		self._git_dir = os.path.join(root, ".git")
+		self._head = os.path.join(self._git_dir, "HEAD")
+		self._fetch_head = os.path.join(self._git_dir, "FETCH_HEAD")
+		# (mtime of .git/HEAD, commit ID) for commitID, and the datetime returned by last_sync():
+		self._commit_id_cache = None
+		self._last_sync_cache = None
+
+	def _invalidateCache(self):
+		self._commit_id_cache = None
+		self._last_sync_cache = None
 
 	def localBranches(self):
 		if os.path.exists(self.root):
-			retval, out = run_statusoutput("git -C %s for-each-ref --format=\"(refname)\" refs/heads" % self.root)
+			retval, out = run_statusoutput(["git", "-C", self.root, "for-each-ref", "--format=%(refname)", "refs/heads"])
 			if retval == 0:
+				prefix_len = len("refs/heads/")
 				for ref in out.split():
-					yield ref.split("/")[-1]
+					yield ref[prefix_len:]
 
 	def localBranchExists(self, branch):
-		return not run("git -C %s show-ref --verify --quiet refs/heads/%s" % (self.root, branch), quiet=self.quiet)
+		return not run(
+			["git", "-C", self.root, "show-ref", "--verify", "--quiet", "refs/heads/%s" % branch], quiet=self.quiet
+		)
 
 	def isReadOnly(self):
+		if not os.access(self.root, os.W_OK):
+			return True
+		# Some filesystems (ie. network mounts) report permissions that disagree with the mount flags, so check those too:
 		try:
-			Path(self.root + "/foo").touch()
-		except (FileNotFoundError, PermissionError):
+			return bool(os.statvfs(self.root).f_flag & os.ST_RDONLY)
+		except OSError:
 			return True
-		else:
-			os.unlink(self.root + "/foo")
-			return False
 
 	def readOnlyCheck(self):
 		if self.isReadOnly():
@@ -39,61 +54,76 @@ class GitHelper(object):
 	def fetchRemote(self, branch, remote="origin", options=None):
 		options = options or []
 		self.readOnlyCheck()
-		opts = " ".join(options)
-		run("git -C %s remote set-branches --add %s %s" % (self.root, remote, branch), quiet=self.quiet)
-		return run("git -C %s fetch %s %s refs/heads/%s:refs/remotes/%s/%s" % (self.root, opts, remote, branch, remote, branch), quiet=self.quiet)
+		# Repositories are cloned with --single-branch, so the branch must be added to the remote's fetch refspecs
+		# for a later "git checkout <branch>" to find <remote>/<branch> and set up tracking:
+		run(["git", "-C", self.root, "remote", "set-branches", "--add", remote, branch], quiet=self.quiet)
+		refspec = "refs/heads/%s:refs/remotes/%s/%s" % (branch, remote, branch)
+		self._invalidateCache()
+		return run(["git", "-C", self.root, "fetch"] + options + [remote, refspec], quiet=self.quiet)
 
 	def clone(self, url, branch, depth=None):
+		self._invalidateCache()
+		cmd = ["git", "clone", "-b", branch]
 		if depth is not None:
-			depth_str = "--depth=%s" % depth
-		else:
-			depth_str = ""
-		return run("git clone -b %s %s --single-branch %s %s" % (branch, depth_str, url, self.root), quiet=self.quiet)
+			cmd.append("--depth=%s" % depth)
+		return run(cmd + ["--single-branch", url, self.root], quiet=self.quiet)
 
 	def pull(self, options=None):
 		options = options or []
 		self.readOnlyCheck()
-		opts = " ".join(options)
-		return run("git -C %s pull %s --ff-only" % (self.root, opts), quiet=self.quiet)
+		self._invalidateCache()
+		return run(["git", "-C", self.root, "pull"] + options + ["--ff-only"], quiet=self.quiet)
 
 	def reset(self, options=None):
 		options = options or []
 		self.readOnlyCheck()
-		opts = " ".join(options)
-		return run("git -C %s reset %s" % (self.root, opts), quiet=self.quiet)
+		self._invalidateCache()
+		return run(["git", "-C", self.root, "reset"] + options, quiet=self.quiet)
 
 	def clean(self, options=None):
 		options = options or []
 		self.readOnlyCheck()
-		opts = " ".join(options)
-		return run("git -C %s clean %s" % (self.root, opts), quiet=self.quiet)
+		return run(["git", "-C", self.root, "clean"] + options, quiet=self.quiet)
 
 	def exists(self):
 		return os.path.exists(self.root)
 
 	def is_git_repo(self):
-		return os.path.exists(os.path.join(self.root, ".git"))
+		return os.path.exists(self._git_dir)
 
 	def checkout(self, branch="master", origin=None):
 		if origin is not None:
-			args = "%s %s" % (origin, branch)
+			args = [origin, branch]
 		else:
-			args = branch
-		retval = run("git -C %s checkout %s" % (self.root, args), quiet=self.quiet)
+			args = [branch]
+		self._invalidateCache()
+		retval = run(["git", "-C", self.root, "checkout"] + args, quiet=self.quiet)
 		return retval == 0
 
 	def last_sync(self):
 		"""Returns datetime of last sync, or None if not a git repo."""
-		check_f = self.root + "/.git/FETCH_HEAD"
-		try:
-			return datetime.fromtimestamp(os.path.getmtime(check_f))
-		except FileNotFoundError:
-			return None
+		if self._last_sync_cache is None:
+			from datetime import datetime
+			try:
+				self._last_sync_cache = datetime.fromtimestamp(os.path.getmtime(self._fetch_head))
+			except FileNotFoundError:
+				return None
+		return self._last_sync_cache
 
 	@property
 	def commitID(self):
-		retval, out = run_statusoutput("git -C %s rev-parse HEAD" % self.root)
+		# HEAD's mtime catches checkouts done behind our back; operations that move the current branch (pull, reset,
+		# etc.) leave HEAD alone, so those clear the cache themselves.
+		try:
+			head_mtime = os.stat(self._head).st_mtime_ns
+		except OSError:
+			head_mtime = None
+		if self._commit_id_cache is not None and self._commit_id_cache[0] == head_mtime:
+			return self._commit_id_cache[1]
+		retval, out = run_statusoutput(["git", "-C", self.root, "rev-parse", "HEAD"])
 		if retval == 0:
-			return out.strip()
+			commit_id = out.strip()
 		else:
-			return None
+			commit_id = None
+		self._commit_id_cache = (head_mtime, commit_id)
+		return commit_id
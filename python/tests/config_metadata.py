@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+
+import configparser
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, "..")
+from ego.config import EgoConfig
+
+
+class KitMetadataTest(unittest.TestCase):
+
+	def setUp(self):
+		# A fake meta-repo with just a metadata directory:
+		self.tmpdir = tempfile.mkdtemp()
+		self.metadata_dir = os.path.join(self.tmpdir, "metadata")
+		os.makedirs(self.metadata_dir)
+		settings = configparser.ConfigParser()
+		settings["global"] = {"meta_repo_path": self.tmpdir, "release": "1.4"}
+		self.config = EgoConfig(settings, "/dev/null", install_path=self.tmpdir)
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+
+	def write_metadata(self, fn, data):
+		with open(os.path.join(self.metadata_dir, fn + ".json"), "w") as f:
+			json.dump(data, f)
+
+	def test_missing(self):
+		self.assertEqual(self.config.kit_info_metadata, {})
+		self.assertEqual(self.config.metadata_version, 1)
+
+	def test_memoized(self):
+		self.write_metadata("kit-info", {"kit_order": ["core-kit"]})
+		first = self.config.kit_info_metadata
+		self.assertEqual(first["kit_order"], ["core-kit"])
+		self.assertIs(self.config.kit_info_metadata, first)
+
+	def test_reread_when_changed(self):
+		# ie. ego sync updated meta-repo after the metadata was first read:
+		self.assertEqual(self.config.kit_info_metadata, {})
+		self.write_metadata("kit-info", {"kit_order": ["core-kit"]})
+		self.assertEqual(self.config.kit_info_metadata["kit_order"], ["core-kit"])
+		self.write_metadata("kit-info", {"kit_order": ["core-kit", "security-kit"]})
+		self.assertEqual(self.config.kit_info_metadata["kit_order"], ["core-kit", "security-kit"])
+
+
+if __name__ == "__main__":
+	unittest.main()
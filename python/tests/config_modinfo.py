@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+
+import configparser
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+sys.path.insert(0, "..")
+import ego.config
+from ego.config import EgoConfig
+
+
+class ModInfoTestCase(unittest.TestCase):
+
+	def setUp(self):
+		# A fake install_path with two modules and their info files, and a private cache directory so we never
+		# touch /var/cache/ego:
+		self.tmpdir = tempfile.mkdtemp()
+		self.install_path = os.path.join(self.tmpdir, "ego")
+		self.info_dir = os.path.join(self.install_path, "modules-info")
+		os.makedirs(os.path.join(self.install_path, "modules"), mode=0o755)
+		os.makedirs(self.info_dir, mode=0o755)
+		for mod in ["foo", "bar"]:
+			with open(os.path.join(self.install_path, "modules", mod + ".ego"), "w"):
+				pass
+			self.write_info(mod, {"description": mod, "version": "1.0", "author": "test"})
+		self.orig_cache_dir = ego.config.MODS_INFO_CACHE_DIR
+		ego.config.MODS_INFO_CACHE_DIR = os.path.join(self.tmpdir, "cache")
+
+	def tearDown(self):
+		ego.config.MODS_INFO_CACHE_DIR = self.orig_cache_dir
+		shutil.rmtree(self.tmpdir)
+
+	def write_info(self, mod, info):
+		with open(os.path.join(self.info_dir, mod + ".json"), "w") as f:
+			json.dump(info, f)
+
+	def load_all(self):
+		return dict(self.new_config().ego_mods_info.items())
+
+	def new_config(self):
+		return EgoConfig(configparser.ConfigParser(), "/dev/null", install_path=self.install_path)
+
+
+class ModInfoCacheTest(ModInfoTestCase):
+
+	def test_cache_written_and_used(self):
+		self.assertEqual(self.load_all()["foo"]["description"], "foo")
+		self.assertEqual(len(os.listdir(ego.config.MODS_INFO_CACHE_DIR)), 1)
+		self.assertEqual(self.load_all()["bar"]["description"], "bar")
+
+	def test_rewrite_with_preserved_mtime(self):
+		self.load_all()
+		path = os.path.join(self.info_dir, "foo.json")
+		st = os.stat(path)
+		# file timestamps are coarse-grained; make sure the rewrite gets a different ctime:
+		time.sleep(0.05)
+		self.write_info("foo", {"description": "FOO", "version": "1.0", "author": "test"})
+		os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+		self.assertEqual(self.load_all()["foo"]["description"], "FOO")
+
+	def test_removed_file(self):
+		self.load_all()
+		os.unlink(os.path.join(self.info_dir, "bar.json"))
+		self.assertEqual(self.load_all()["bar"], {})
+
+	def test_corrupt_cache(self):
+		self.load_all()
+		cache_dir = ego.config.MODS_INFO_CACHE_DIR
+		for fn in os.listdir(cache_dir):
+			with open(os.path.join(cache_dir, fn), "wb") as f:
+				f.write(b"garbage")
+		self.assertEqual(self.load_all()["foo"]["description"], "foo")
+
+
+class LazyModInfoTest(ModInfoTestCase):
+
+	def write_aggregate(self):
+		# Only the aggregate is installed -- no per-module files:
+		shutil.rmtree(self.info_dir)
+		with open(os.path.join(self.install_path, "modules-info.json"), "w") as f:
+			json.dump({"foo": {"description": "agg foo", "version": "2.0", "author": "test"}}, f)
+
+	def check_access_orders(self, expected_foo, expected_bar):
+		# single lookup first, then everything:
+		info = self.new_config().ego_mods_info
+		self.assertEqual(info["foo"], expected_foo)
+		self.assertEqual(dict(info.items()), {"foo": expected_foo, "bar": expected_bar})
+		self.assertEqual(info["bar"], expected_bar)
+		# everything first, then single lookups:
+		info = self.new_config().ego_mods_info
+		self.assertEqual(dict(info.items()), {"foo": expected_foo, "bar": expected_bar})
+		self.assertEqual(info["foo"], expected_foo)
+		self.assertEqual(info["bar"], expected_bar)
+
+	def test_access_order_files(self):
+		self.check_access_orders(
+			{"description": "foo", "version": "1.0", "author": "test"},
+			{"description": "bar", "version": "1.0", "author": "test"}
+		)
+
+	def test_access_order_aggregate(self):
+		self.write_aggregate()
+		self.check_access_orders({"description": "agg foo", "version": "2.0", "author": "test"}, {})
+
+	def test_hidden_modules_skipped(self):
+		for fn in [".ego", ".hidden.ego"]:
+			with open(os.path.join(self.install_path, "modules", fn), "w"):
+				pass
+		self.assertEqual(sorted(self.new_config().ego_mods), ["bar", "foo"])
+
+	def test_lookup_reads_single_file(self):
+		info = self.new_config().ego_mods_info
+		os.unlink(os.path.join(self.info_dir, "bar.json"))
+		self.assertEqual(info["foo"]["description"], "foo")
+		self.assertIn("bar", info)
+		self.assertNotIn("baz", info)
+		with self.assertRaises(KeyError):
+			info["baz"]
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+
+import io
+import sys
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from types import SimpleNamespace
+sys.path.insert(0, "..")
+from ego.module import EgoModule
+from ego.output import Output
+
+
+class Module(EgoModule):
+
+	# Like a module that doesn't define any arguments of its own.
+
+	def handle(self):
+		self.handled = True
+
+
+class ParseCommonTest(unittest.TestCase):
+
+	def setUp(self):
+		info = {"description": "test module", "version": "1.0", "author": "Tester"}
+		self.config = SimpleNamespace(ego_mods_info={"test": info})
+		self.orig_verbosity = Output.verbosity
+
+	def tearDown(self):
+		Output.verbosity = self.orig_verbosity
+
+	def new_module(self):
+		return Module("test", self.config, "2.8.0")
+
+	def test_defaults(self):
+		self.assertEqual(self.new_module()._parse_common(()), 1)
+
+	def test_v_and_q(self):
+		mod = self.new_module()
+		self.assertEqual(mod._parse_common(("-v",)), 2)
+		self.assertEqual(mod._parse_common(("-vvv",)), 4)
+		self.assertEqual(mod._parse_common(("-vv", "-v")), 4)
+		self.assertEqual(mod._parse_common(("-qq",)), -1)
+
+	def test_verbosity(self):
+		mod = self.new_module()
+		self.assertEqual(mod._parse_common(("--verbosity", "3")), 3)
+		self.assertEqual(mod._parse_common(("--verbosity=0",)), 0)
+		self.assertEqual(mod._parse_common(("--verbosity", "-1")), -1)
+
+	def test_fallback(self):
+		# anything _parse_common() can't handle by itself is left to argparse:
+		mod = self.new_module()
+		for args in [
+			("--verbosity", "x"), ("--verbosity=",), ("--verbosity",), ("--verb", "2"), ("-v", "-q"),
+			("--verbosity", "2", "-v"), ("-h",), ("--help",), ("-vq",), ("extra",)
+		]:
+			self.assertIsNone(mod._parse_common(args), args)
+
+	def test_version(self):
+		out = io.StringIO()
+		with redirect_stdout(out), self.assertRaises(SystemExit) as cm:
+			self.new_module()._parse_common(("--version",))
+		self.assertEqual(cm.exception.code, 0)
+		self.assertEqual(out.getvalue(), "ego 2.8.0 / test 1.0 (by Tester)\n")
+
+	def test_call_fast_path(self):
+		mod = self.new_module()
+		mod("-vv")
+		self.assertTrue(mod.handled)
+		self.assertEqual(Output.verbosity, 3)
+		self.assertIsNone(mod.parser)
+		self.assertIsNone(mod.options.parser)
+
+	def test_call_fallback(self):
+		mod = self.new_module()
+		mod("--verb", "0")
+		self.assertTrue(mod.handled)
+		self.assertEqual(Output.verbosity, 0)
+		self.assertIsNotNone(mod.parser)
+
+	def test_call_errors(self):
+		with redirect_stdout(io.StringIO()), self.assertRaises(SystemExit) as cm:
+			self.new_module()("-h")
+		self.assertEqual(cm.exception.code, 0)
+		for args in [("-v", "-q"), ("--verbosity", "x")]:
+			with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as cm:
+				self.new_module()(*args)
+			self.assertEqual(cm.exception.code, 2)
+
+
+if __name__ == "__main__":
+	unittest.main()
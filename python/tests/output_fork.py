@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Logs a message, then forks a child that exits with sys.exit(), like sync.ego's drop_perms_and_run():
+FORK_SCRIPT = """
+import os, sys
+sys.path.insert(0, %r)
+from ego.output import Output
+Output.log("before fork")
+pid = os.fork()
+if pid == 0:
+	sys.exit(0)
+os.waitpid(pid, 0)
+Output.log("after fork")
+"""
+
+
+class OutputForkTest(unittest.TestCase):
+
+	def test_fork_with_piped_stdout(self):
+		python_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+		env = dict(os.environ)
+		# stdout must be block-buffered, as it is when piped to tee, cron or a log file:
+		env.pop("PYTHONUNBUFFERED", None)
+		out = subprocess.run(
+			[sys.executable, "-c", FORK_SCRIPT % python_dir], stdout=subprocess.PIPE, env=env, check=True
+		).stdout.decode()
+		self.assertEqual(out, "before fork\nafter fork\n")
+
+
+if __name__ == "__main__":
+	unittest.main()